@@ -281,7 +281,7 @@ function registerIpcHandlersForYoutubeOperations() {
           videoFilePath,
           outputDirectoryPath: pathMod.dirname(videoFilePath),
           language: language || 'auto',
-          model: model || 'mlx-community/whisper-large-v3-turbo',
+          model: model || 'mlx-community/whisper-large-v3-turbo-q4',
         });
         return { success: true, ...result };
       } catch (err: any) {
@@ -40,6 +40,98 @@ function generateUniqueTaskIdentifier() {
   return `task_${Date.now()}_${Math.random().toString(16).slice(2, 10)}`;
 }
 
+/**
+ * Why: spawning transcribe_audio.py per task pays the mlx_whisper import and
+ * model load (hundreds of MB of weights + Metal kernel compile) every time.
+ * A persistent `--serve` worker loads the model once; we pipe it one JSON job
+ * per stdin line and route its job_id-tagged progress lines back to tasks.
+ * One worker per model name, spawned lazily and respawned if it dies.
+ */
+const activeTranscriptionWorkersByModel = new Map();
+
+function ensureTranscriptionWorkerForModel(model) {
+  const existingWorker = activeTranscriptionWorkersByModel.get(model);
+  if (existingWorker
+      && existingWorker.process.exitCode === null
+      && !existingWorker.process.killed) {
+    return existingWorker;
+  }
+
+  ensureDirectoryExistsRecursively(TRANSCRIPTION_LOG_DIRECTORY_PATH);
+  const pythonBinaryPath = resolveVenvPythonBinaryPath();
+  const childProcess = spawn(pythonBinaryPath, [
+    TRANSCRIPTION_PYTHON_SCRIPT_PATH, "--serve", "--model", model,
+  ], {
+    stdio: ["pipe", "pipe", "pipe"],
+  });
+
+  const worker = {
+    model,
+    process: childProcess,
+    jobHandlersById: new Map(),
+    logFilePath: path.join(
+      TRANSCRIPTION_LOG_DIRECTORY_PATH,
+      `transcription_worker_${childProcess.pid || Date.now()}.log`
+    ),
+  };
+
+  let stderrLineBuffer = "";
+  childProcess.stderr.on("data", (chunk) => {
+    stderrLineBuffer += chunk.toString();
+    const completedLines = stderrLineBuffer.split(/\r?\n/);
+    stderrLineBuffer = completedLines.pop() || "";
+
+    for (const line of completedLines) {
+      const trimmedLine = line.trim();
+      if (!trimmedLine) continue;
+
+      // Why: JSON lines carry job_id for routing; anything else (mlx/hf
+      // noise, model-load lines) goes to the worker-level log
+      let progressData = null;
+      try {
+        progressData = JSON.parse(trimmedLine);
+      } catch {
+        // Why: not JSON — just a regular log line from Python/mlx
+      }
+
+      const jobHandler = progressData && progressData.job_id
+        ? worker.jobHandlersById.get(progressData.job_id)
+        : null;
+      if (jobHandler) {
+        jobHandler(progressData, trimmedLine);
+      } else {
+        fs.appendFileSync(worker.logFilePath, `[worker] ${trimmedLine}\n`, "utf-8");
+      }
+    }
+  });
+
+  childProcess.stdout.on("data", (chunk) => {
+    fs.appendFileSync(worker.logFilePath, `[stdout] ${chunk.toString()}`, "utf-8");
+  });
+
+  // Why: a dead worker must fail its in-flight jobs, not strand them at "running"
+  const failAllInFlightJobs = (reason) => {
+    const handlers = [...worker.jobHandlersById.entries()];
+    worker.jobHandlersById.clear();
+    for (const [jobId, handler] of handlers) {
+      handler({ job_id: jobId, status: "error", error: reason }, null);
+    }
+  };
+
+  childProcess.on("error", (error) => {
+    failAllInFlightJobs(`Transcription worker failed to start: ${error.message}`);
+    activeTranscriptionWorkersByModel.delete(model);
+  });
+
+  childProcess.on("close", (exitCode) => {
+    failAllInFlightJobs(`Transcription worker exited with code ${exitCode}`);
+    activeTranscriptionWorkersByModel.delete(model);
+  });
+
+  activeTranscriptionWorkersByModel.set(model, worker);
+  return worker;
+}
+
 function ensureDirectoryExistsRecursively(directoryPath) {
   fs.mkdirSync(directoryPath, { recursive: true });
 }
@@ -63,7 +155,7 @@ export function startBackgroundTranscriptionTask({
   videoFilePath,
   outputDirectoryPath,
   language = "auto",
-  model = "mlx-community/whisper-large-v3-turbo",
+  model = "mlx-community/whisper-large-v3-turbo-q4",
 }) {
   if (!fs.existsSync(videoFilePath)) {
     throw new Error(`Input video file not found: ${videoFilePath}`);
@@ -107,115 +199,67 @@ export function startBackgroundTranscriptionTask({
 
   insertNewTaskRecord(taskRecord);
 
-  const pythonBinaryPath = resolveVenvPythonBinaryPath();
-  const pythonScriptArgs = [
-    TRANSCRIPTION_PYTHON_SCRIPT_PATH,
-    "--input", videoFilePath,
-    "--output", transcriptOutputPath,
-    "--language", resolvedLanguage,
-    "--model", model,
-  ];
-
-  const childProcess = spawn(pythonBinaryPath, pythonScriptArgs, {
-    stdio: ["ignore", "pipe", "pipe"],
-  });
+  const worker = ensureTranscriptionWorkerForModel(model);
 
   const runtimeState = registerActiveTaskRuntimeState(taskId, {
-    pid: childProcess.pid,
-    process: childProcess,
+    pid: worker.process.pid,
+    process: worker.process,
     log_path: taskLogFilePath,
     started_at: createdAtTimestamp,
   });
 
   updateExistingTaskRecord(taskId, {
     status: "running",
-    pid: childProcess.pid,
+    pid: worker.process.pid,
   });
 
   /**
-   * Why: the Python script emits JSON lines to stderr with progress updates;
+   * Why: the worker emits JSON lines to stderr tagged with our job_id;
    * we parse each line and update the task store so callers can poll status.
    */
-  let stderrLineBuffer = "";
-  childProcess.stderr.on("data", (chunk) => {
-    stderrLineBuffer += chunk.toString();
-    const completedLines = stderrLineBuffer.split(/\r?\n/);
-    stderrLineBuffer = completedLines.pop() || "";
-
-    for (const line of completedLines) {
-      const trimmedLine = line.trim();
-      if (!trimmedLine) continue;
-
-      // Why: log everything for debugging
-      fs.appendFileSync(taskLogFilePath, `[stderr] ${trimmedLine}\n`, "utf-8");
-
-      // Why: try to parse JSON progress; non-JSON lines are just logged
-      try {
-        const progressData = JSON.parse(trimmedLine);
-        const patch = {
-          last_progress: progressData,
-          percentage: Math.round((progressData.progress || 0) * 100),
-        };
-        if (progressData.elapsed_seconds != null) patch.elapsed_seconds = progressData.elapsed_seconds;
-        if (progressData.estimated_total != null) patch.estimated_total = progressData.estimated_total;
-        if (progressData.audio_duration != null) patch.audio_duration = progressData.audio_duration;
-        if (progressData.status === "completed") {
-          patch.status = "completed";
-          patch.percentage = 100;
-          patch.finished_at = getCurrentIsoTimestamp();
-          patch.transcript_path = progressData.transcript_path || transcriptOutputPath;
-          patch.detected_language = progressData.language;
-          patch.elapsed_seconds = progressData.elapsed_seconds;
-        } else if (progressData.status === "error") {
-          patch.status = "failed";
-          patch.error = progressData.error || "Unknown transcription error";
-        }
-        updateExistingTaskRecord(taskId, patch);
-      } catch {
-        // Why: not JSON — just a regular log line from Python/mlx
-      }
+  worker.jobHandlersById.set(taskId, (progressData, rawLine) => {
+    // Why: log everything for debugging
+    if (rawLine) {
+      fs.appendFileSync(taskLogFilePath, `[stderr] ${rawLine}\n`, "utf-8");
     }
-  });
 
-  // Why: capture stdout (if any) for debug logging
-  childProcess.stdout.on("data", (chunk) => {
-    fs.appendFileSync(taskLogFilePath, `[stdout] ${chunk.toString()}`, "utf-8");
-  });
-
-  childProcess.on("error", (error) => {
-    updateExistingTaskRecord(taskId, {
-      status: "failed",
-      error: error.message,
-      finished_at: getCurrentIsoTimestamp(),
-    });
-    removeActiveTaskRuntimeState(taskId);
-  });
+    const patch = {
+      last_progress: progressData,
+      percentage: Math.round((progressData.progress || 0) * 100),
+    };
+    if (progressData.elapsed_seconds != null) patch.elapsed_seconds = progressData.elapsed_seconds;
+    if (progressData.estimated_total != null) patch.estimated_total = progressData.estimated_total;
+    if (progressData.audio_duration != null) patch.audio_duration = progressData.audio_duration;
+    if (progressData.status === "completed") {
+      patch.status = "completed";
+      patch.percentage = 100;
+      patch.finished_at = getCurrentIsoTimestamp();
+      patch.transcript_path = progressData.transcript_path || transcriptOutputPath;
+      patch.detected_language = progressData.language;
+      patch.elapsed_seconds = progressData.elapsed_seconds;
+    } else if (progressData.status === "error") {
+      patch.status = "failed";
+      patch.error = progressData.error || "Unknown transcription error";
+      patch.finished_at = getCurrentIsoTimestamp();
+    }
+    updateExistingTaskRecord(taskId, patch);
 
-  childProcess.on("close", (exitCode) => {
-    const finishedAtTimestamp = getCurrentIsoTimestamp();
-
-    // Why: only mark completed if exit 0 AND not already marked by progress handler
-    if (exitCode === 0) {
-      const currentTask = updateExistingTaskRecord(taskId, {
-        finished_at: finishedAtTimestamp,
-      });
-      // Why: if status wasn't set to completed by progress parsing, do it now
-      if (currentTask && currentTask.status !== "completed") {
-        updateExistingTaskRecord(taskId, {
-          status: "completed",
-          percentage: 100,
-        });
-      }
-    } else {
-      updateExistingTaskRecord(taskId, {
-        status: "failed",
-        finished_at: finishedAtTimestamp,
-        exit_code: exitCode,
-      });
+    // Why: terminal states release the task; the worker itself stays alive
+    // for the next job
+    if (progressData.status === "completed" || progressData.status === "error") {
+      worker.jobHandlersById.delete(taskId);
+      removeActiveTaskRuntimeState(taskId);
     }
-    removeActiveTaskRuntimeState(taskId);
   });
 
+  worker.process.stdin.write(JSON.stringify({
+    job_id: taskId,
+    input: videoFilePath,
+    output: transcriptOutputPath,
+    language: resolvedLanguage,
+    model,
+  }) + "\n");
+
   return {
     taskId,
     videoFilePath,
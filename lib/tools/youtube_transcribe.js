@@ -45,7 +45,8 @@ export const definition = {
       model: {
         type: "string",
         description:
-          "HuggingFace model name. Default: 'mlx-community/whisper-large-v3-turbo'.",
+          "HuggingFace model name. Default: 'mlx-community/whisper-large-v3-turbo-q4' "
+          + "(4-bit quantized; ~2x faster decode on memory-bound Apple Silicon with a small quality trade).",
       },
       output_path: {
         type: "string",
@@ -61,7 +62,7 @@ export const definition = {
 export async function handler(args = {}) {
   const inputRaw = coerceValueToTrimmedString(args.input || args.url || args.file_path || args.filePath) || "";
   const language = coerceValueToTrimmedString(args.language) || "auto";
-  const model = coerceValueToTrimmedString(args.model) || "mlx-community/whisper-large-v3-turbo";
+  const model = coerceValueToTrimmedString(args.model) || "mlx-community/whisper-large-v3-turbo-q4";
 
   if (!inputRaw) {
     return formatErrorResultAsTextContent(